@@ -7,9 +7,10 @@ runs _every scroll_ (up to 20 clicks per batch) so the scraper keeps a
 steady view depth even on conversation‑heavy timelines.
 
 Other tweaks
-• Confirmed the persistent‑profile path is **exactly** the working‑dir
-  `.chromium-profile/` unless you override `PROFILE_DIR` — so all your
-  existing cookies/logins carry over untouched.
+• Logins now persist as per‑account storage‑state JSON under the
+  working‑dir `.auth-states/` (override with `STATE_DIR`) instead of a
+  shared `.chromium-profile/` — log in once per account; cookies are
+  restored into a fresh context on every scrape.
 • Added `SHOWMORE_MAX` env var (default 20) to tune the expansion depth.
 • Minor: extractor now grabs retweet context (`retweeted_by`).
 
@@ -17,14 +18,15 @@ Win 11 / Python 3.10 / Playwright 1.43 verified.
 """
 
 from __future__ import annotations
-import os, sys, json, time, atexit, logging
+import os, sys, json, time, atexit, asyncio, logging, threading, itertools
+from collections import deque
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
-from multiprocessing import Process
 from textwrap import dedent
 
-from flask import Flask, request, redirect, url_for, render_template_string
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+from flask import Flask, Response, request, redirect, url_for, stream_with_context
+from playwright.async_api import async_playwright, TimeoutError as PWTimeout
 
 # ─────────────────── Config / Logging ───────────────────
 LOG_LVL = os.getenv('LOGLEVEL', 'INFO').upper()
@@ -35,12 +37,76 @@ HEADLESS_DEFAULT = bool(int(os.getenv('HEADLESS', '0')))  # 👈 default *visibl
 SCROLLS_DEFAULT  = int(os.getenv('SCROLLS', 60))
 WAIT_TIMEOUT_MS  = int(os.getenv('WAIT_MS', 30000))
 SHOWMORE_MAX     = int(os.getenv('SHOWMORE_MAX', 20))
+BLOCK_MEDIA      = bool(int(os.getenv('BLOCK_MEDIA', '1')))  # skip images/fonts/css
+EXHAUSTED_AFTER  = int(os.getenv('EXHAUSTED_AFTER', 3))  # empty scrolls before giving up
+CTX_RECYCLE_SCROLLS = int(os.getenv('CTX_RECYCLE_SCROLLS', 25))  # scrolls per context
 
-# Persistent Chrome/Edge profile directory (for cookies, logins, etc.)
-PROFILE_DIR = Path(os.getenv('PROFILE_DIR', '.chromium-profile')).resolve()
-PROFILE_DIR.mkdir(exist_ok=True)
+# We only read DOM text, so images/video/fonts/css are wasted bytes —
+# often >80% of a timeline's traffic.  Scripts/xhr stay: tweets lazy-load.
+BLOCKED_RESOURCES = {"image", "media", "font", "stylesheet"}
 
-SCRAPE_PROCS: dict[str, Process] = {}
+# Per-account auth state (cookies/localStorage) captured via
+# BrowserContext.storage_state — one JSON per account instead of a shared
+# on-disk Chromium profile, so contexts stay cheap and isolated.
+STATE_DIR = Path(os.getenv('STATE_DIR', '.auth-states')).resolve()
+STATE_DIR.mkdir(exist_ok=True)
+
+
+def state_path(account: str) -> Path:
+    return STATE_DIR / f"{account}.json"
+
+# ─────────────────── Scrape scheduling ───────────────────
+# All scrapes run as coroutines on one asyncio loop living on a dedicated
+# thread, multiplexed over a single Playwright driver + CDP websocket —
+# no per-job OS process, no per-job driver spawn.
+SCRAPE_JOBS: dict[tuple[str, str], Future] = {}
+_jobs_lock = threading.Lock()
+JOB_IDS = itertools.count(1)  # C-level atomic counter, no lock needed
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True,
+                             name="scrape-loop").start()
+        return _loop
+
+
+def start_scrape(acct: str, feed: str, scrolls: int, headless: bool) -> bool:
+    """Schedule a scrape unless one is already running for (acct, feed).
+
+    The slot is claimed under _jobs_lock *before* the coroutine is
+    scheduled — scheduling first and cancelling the loser would tear down
+    a scrape that may already hold a BrowserContext. Dead entries are
+    swept by the reaper thread rather than checked on every request.
+    """
+    key = (acct, feed)
+    with _jobs_lock:
+        cur = SCRAPE_JOBS.get(key)
+        if cur is not None and not cur.done():
+            return False
+        SCRAPE_JOBS[key] = asyncio.run_coroutine_threadsafe(
+            scrape_worker(acct, feed, scrolls, headless), get_loop())
+    log.info("scheduled scrape #%d for %s/%s", next(JOB_IDS), acct, feed)
+    return True
+
+
+def reap_jobs(interval: float = 30.0):
+    """Drop finished scrape jobs so the registry doesn't leak."""
+    while True:
+        time.sleep(interval)
+        for key, fut in list(SCRAPE_JOBS.items()):
+            if fut.done():
+                with _jobs_lock:
+                    # only drop the future we snapshotted — start_scrape may
+                    # have replaced it with a live job in the meantime
+                    if SCRAPE_JOBS.get(key) is fut:
+                        del SCRAPE_JOBS[key]
 
 # ─────────────────── Helpers ───────────────────
 
@@ -49,123 +115,382 @@ def js(src: str) -> str:
     return dedent(src).strip().replace("\n", " ")
 
 
-def write_jsonl(file: Path, obj: dict):
-    with file.open("a", encoding="utf‑8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-
-# "Show more" expander JS
-JS_EXPAND_SHOWMORE = js("""
-    (maxClicks) => {
-      let clicks = 0;
-      const btns = () => Array.from(document.querySelectorAll('[role="button"]'))
-        .filter(b => {
-          const t = (b.textContent||'').toLowerCase();
-          return t.includes('show more') && !b.closest('a[href*="/i/grok/share/"]');
-        });
-      while (clicks < maxClicks) {
-        const b = btns()[0];
-        if (!b) break;
-        try { b.click(); clicks++; }
-        catch(_) { break; }
-      }
-      return clicks;
-    }
-""")
+# orjson (Rust) encodes/decodes a few times faster than stdlib json and
+# emits bytes directly; fall back to stdlib so the script stays dep-light.
+try:
+    import orjson
+
+    def jsonl_line(obj: dict) -> bytes:
+        return orjson.dumps(obj) + b"\n"
+
+    jsonl_loads = orjson.loads
+except ImportError:
+    def jsonl_line(obj: dict) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    jsonl_loads = json.loads
+
 
 # ─────────────────── Core scraper ───────────────────
 
-def scrape_worker(account: str, feed: str, scrolls: int, headless: bool):
-    """Runs in its own *OS process* so Playwright is fully isolated."""
-    try:
-        pw = sync_playwright().start()
-        ctx = pw.chromium.launch_persistent_context(
-            user_data_dir=str(PROFILE_DIR),
-            headless=headless,
-            args=["--disable-blink-features=AutomationControlled"],
-        )
-        page = ctx.new_page()
-        url = "https://x.com/home" if feed == "home" else f"https://x.com/{account}/with_replies"
-        log.info("[%s] ▶ %s", account, url)
-        try:
-            page.goto(url, timeout=WAIT_TIMEOUT_MS)
-        except PWTimeout:
-            log.warning("[%s] initial navigation timed out; retrying once", account)
-            page.goto(url, timeout=WAIT_TIMEOUT_MS)
+# One fused JS step per scroll: expand "Show more", extract tweet
+# columns, then scroll — a single CDP round-trip instead of three or
+# more.  Takes the recently-seen ids so duplicates are filtered
+# page-side and never cross the pipe.  Installed once per context via
+# add_init_script, so each scroll sends a one-line call instead of
+# re-shipping ~6KB of JS through the driver.
+STEP_JS = js("""
+        (() => {
+          const SM_RE = /show more/i;
+          window.__smQueue = [];
+          const collect = (root) => {
+            if (!root.querySelectorAll) return;
+            root.querySelectorAll('[role="button"]').forEach(b => {
+              if (SM_RE.test(b.textContent||'') && !b.closest('a[href*="/i/grok/share/"]'))
+                window.__smQueue.push(b);
+            });
+          };
+          const install = () => {
+            new MutationObserver(muts => {
+              for (const m of muts) for (const n of m.addedNodes) collect(n);
+            }).observe(document.body, {subtree: true, childList: true});
+          };
+          if (document.body) install(); else addEventListener('DOMContentLoaded', install);
+          const nextBtn = () => {
+            while (window.__smQueue.length) {
+              const b = window.__smQueue.shift();
+              if (b.isConnected && SM_RE.test(b.textContent||'')) return b;
+            }
+            return null;
+          };
+          window.__scrapeStep = async ({seen, maxClicks}) => {
+          let clicks = 0;
+          if (!window.__smQueue.length && !window.__smScanned) {
+            collect(document); window.__smScanned = true;
+          }
+          const settle = () => new Promise(resolve => {
+            let mo;
+            const done = () => { if (mo) mo.disconnect(); resolve(); };
+            const hard = setTimeout(done, 1500);
+            let quiet = setTimeout(done, 300);
+            mo = new MutationObserver(() => {
+              clearTimeout(quiet);
+              quiet = setTimeout(() => { clearTimeout(hard); done(); }, 150);
+            });
+            mo.observe(document.body, {subtree: true, childList: true});
+          });
+          while (clicks < maxClicks) {
+            const b = nextBtn();
+            if (!b) break;
+            try { b.click(); clicks++; }
+            catch(_) { break; }
+            await settle();
+          }
+          const S=new Set(seen);
+          const STATUS_RE=/\/([^/]+)\/status\/(\d+)/;
+          const REPOST_RE=/^(.*?) reposted/i;
+          const pick=(s,p=document)=>p.querySelector(s);
+          const txt=n=>n? n.innerText||n.textContent||'' : '';
+          const ids=[],usernames=[],contents=[],timestamps=[],isRetweets=[],retweetedBys=[],tweetUrls=[];
+          document.querySelectorAll('article').forEach(art=>{
+            try{
+              const a=pick('a[href*="/status/"]:has(time)',art);
+              const timeTag=a?pick('time',a):pick('time',art);
+              if(!timeTag) return;
+              const href=a?a.href:'';
+              const sm=STATUS_RE.exec(href);
+              const id=sm?sm[2]:'';
+              const user=sm?sm[1]:'unknown';
+              const key=id||(user+'_'+timeTag.dateTime);
+              if(S.has(key)) return;
+              const text=txt(pick('[data-testid="tweetText"], div[lang]',art)).trim();
+              const sc=pick('[data-testid="socialContext"]',art);
+              let retBy=null;
+              if(sc){
+                const m=REPOST_RE.exec(sc.textContent||'');
+                if(m) retBy=m[1].trim();
+              }
+              ids.push(id); usernames.push(user); contents.push(text);
+              timestamps.push(timeTag.dateTime); isRetweets.push(sc?1:0);
+              retweetedBys.push(retBy); tweetUrls.push(href);
+            }catch(_){}
+          });
+          const count=document.querySelectorAll('article').length;
+          window.scrollBy(0,1800);
+          return {ids, usernames, contents, timestamps, isRetweets, retweetedBys, tweetUrls, clicks, count};
+          };
+        })();
+    """)
+
 
-        # If /home requires auth, gracefully fall back
-        if feed == "home" and "login" in page.url:
-            log.warning("[%s] not logged in – falling back to public timeline", account)
-            page.goto(f"https://x.com/{account}", timeout=WAIT_TIMEOUT_MS)
+# One Playwright driver + one shared Browser for the whole process; each
+# scrape gets a throwaway BrowserContext (~tens of ms, tens of MB) instead
+# of a full persistent-profile Chromium launch.  The browser is recycled
+# after RECYCLE_AFTER contexts to keep native-memory drift bounded.
+RECYCLE_AFTER = int(os.getenv('RECYCLE_AFTER', 100))
+_pw_lock = asyncio.Lock()
+_pw = None          # async_playwright driver
+_browser = None     # shared Browser
+_pw_pages = 0       # contexts served since last (re)launch
 
-        def wait_article():
+
+async def get_browser(headless: bool):
+    """Return the shared browser, (re)launching as needed."""
+    global _pw, _browser, _pw_pages
+    async with _pw_lock:
+        # defer the recycle while any scrape still holds a context on the
+        # shared browser — closing it under them kills their pages mid-scroll
+        if (_browser is not None and _pw_pages >= RECYCLE_AFTER
+                and not _browser.contexts):
+            log.info("recycling browser after %d contexts", _pw_pages)
             try:
-                page.wait_for_selector("article", timeout=WAIT_TIMEOUT_MS)
-                return True
-            except PWTimeout:
-                Path("errors").mkdir(exist_ok=True)
-                fname = Path("errors") / f"timeout_{account}_{int(time.time())}.png"
-                page.screenshot(path=str(fname))
-                log.error("[%s] selector timeout – screenshot dumped to %s", account, fname)
-                return False
-
-        if not wait_article():
-            ctx.close(); pw.stop(); return  # abort
-
-        page.keyboard.press("Escape"); time.sleep(1)  # dismiss any modal
-
-        # JS extractor (now includes retweeted_by)
-        extractor = js("""
-            () => {
-              const pick=(s,p=document)=>p.querySelector(s);
-              const txt=n=>n? n.innerText||n.textContent||'' : '';
-              const tweets=[];
-              document.querySelectorAll('article').forEach(art=>{
-                try{
-                  const timeTag=pick('time',art);
-                  if(!timeTag) return;
-                  const a=timeTag.closest('a');
-                  const href=a?a.href:'';
-                  const id=(href.match(/status\/(\d+)/)||[])[1]||'';
-                  const user=href.split('/').slice(-3,-2)[0]||'unknown';
-                  const text=txt(pick('[data-testid="tweetText"], div[lang]',art)).trim();
-                  const sc=pick('[data-testid="socialContext"]',art);
-                  let retBy=null;
-                  if(sc){
-                    const m=(sc.textContent||'').match(/^(.*?) reposted/i);
-                    if(m) retBy=m[1].trim();
-                  }
-                  tweets.push({id,username:user,content:text,timestamp:timeTag.dateTime,is_retweet:!!sc,retweeted_by:retBy,tweet_url:href});
-                }catch(_){}
-              });
-              return tweets;
-            }
-        """)
+                await _browser.close()
+            except Exception:
+                pass
+            _browser = None
+        if _browser is None:
+            if _pw is None:
+                _pw = await async_playwright().start()
+                atexit.register(_shutdown_at_exit)
+            args = ["--disable-blink-features=AutomationControlled"]
+            if BLOCK_MEDIA:
+                args.append("--blink-settings=imagesEnabled=false")
+            _browser = await _pw.chromium.launch(headless=headless, args=args)
+            _pw_pages = 0
+        _pw_pages += 1
+        return _browser
+
+
+async def get_context(account: str, headless: bool):
+    """New context on the shared browser, restoring the account's login."""
+    browser = await get_browser(headless)
+    sp = state_path(account)
+    ctx = await browser.new_context(
+        storage_state=str(sp) if sp.exists() else None)
+    await ctx.add_init_script(STEP_JS)
+    return ctx
+
+
+async def shutdown_playwright():
+    global _pw, _browser
+    async with _pw_lock:
+        if _browser is not None:
+            try:
+                await _browser.close()
+            except Exception:
+                pass
+            _browser = None
+        if _pw is not None:
+            try:
+                await _pw.stop()
+            except Exception:
+                pass
+            _pw = None
+
+
+def _shutdown_at_exit():
+    # the daemon loop thread is still alive while atexit handlers run
+    if _loop is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown_playwright(), _loop).result(timeout=10)
+        except Exception:
+            pass
+
+
+# Telemetry endpoints the timeline calls constantly but that carry no
+# tweet content — dropping them saves a request per scroll or two.
+ANALYTICS_HINTS = ("google-analytics.com", "doubleclick.net",
+                   "ads-twitter.com", "branch.io", "/i/jot")
+
+
+async def block_media(route):
+    req = route.request
+    if (req.resource_type in BLOCKED_RESOURCES
+            or any(h in req.url for h in ANALYTICS_HINTS)):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# Bound how many pages run at once: each live scrape holds a Chromium
+# renderer, so an unbounded fan-out lets one user exhaust memory.
+MAX_SCRAPES = int(os.getenv('MAX_SCRAPES', 4))
+_scrape_sem = asyncio.Semaphore(MAX_SCRAPES)
+
+
+async def scrape_worker(account: str, feed: str, scrolls: int, headless: bool):
+    """One scrape = one coroutine + one page on the shared context."""
+    async with _scrape_sem:
+        await _scrape(account, feed, scrolls, headless)
+
+
+async def open_timeline(ctx, account: str, url: str, feed: str):
+    """New page on ctx, navigated to the timeline and ready to scroll."""
+    page = await ctx.new_page()
+    if BLOCK_MEDIA:
+        await page.route("**/*", block_media)
+    log.info("[%s] ▶ %s", account, url)
+    try:
+        await page.goto(url, timeout=WAIT_TIMEOUT_MS, wait_until="domcontentloaded")
+    except PWTimeout:
+        log.warning("[%s] initial navigation timed out; retrying once", account)
+        await page.goto(url, timeout=WAIT_TIMEOUT_MS, wait_until="domcontentloaded")
+
+    # If /home requires auth, gracefully fall back
+    if feed == "home" and "login" in page.url:
+        log.warning("[%s] not logged in – falling back to public timeline", account)
+        await page.goto(f"https://x.com/{account}", timeout=WAIT_TIMEOUT_MS, wait_until="domcontentloaded")
+
+    try:
+        await page.wait_for_selector("article", timeout=WAIT_TIMEOUT_MS)
+    except PWTimeout:
+        Path("errors").mkdir(exist_ok=True)
+        fname = Path("errors") / f"timeout_{account}_{int(time.time())}.png"
+        await page.screenshot(path=str(fname))
+        log.error("[%s] selector timeout – screenshot dumped to %s", account, fname)
+        return None
+
+    await page.keyboard.press("Escape")  # dismiss any modal; next wait covers the close
+    return page
+
+
+async def run_step(page, args: dict):
+    """Evaluate window.__scrapeStep through a raw CDP Runtime.evaluate.
+
+    Skips Playwright's handle-resolution wrapper on the one call that runs
+    every scroll; falls back to page.evaluate if the session dies or the
+    expression throws.
+    """
+    cdp = getattr(page, "_cdp_session", None)
+    if cdp is None:
+        cdp = await page.context.new_cdp_session(page)
+        page._cdp_session = cdp
+    expr = f"window.__scrapeStep({json.dumps(args)})"
+    try:
+        resp = await cdp.send("Runtime.evaluate", {
+            "expression": expr, "awaitPromise": True, "returnByValue": True})
+    except Exception:
+        resp = None
+    if not resp or "exceptionDetails" in resp:
+        return await page.evaluate("a => window.__scrapeStep(a)", args)
+    return resp["result"]["value"]
+
+
+async def _scrape(account: str, feed: str, scrolls: int, headless: bool):
+    ctx = None
+    try:
+        url = "https://x.com/home" if feed == "home" else f"https://x.com/{account}/with_replies"
+        ctx = await get_context(account, headless)
+        page = await open_timeline(ctx, account, url, feed)
+        if page is None:
+            await close_context(ctx, account); ctx = None; return  # abort
 
         folder = Path(f"{account}_{feed}"); folder.mkdir(exist_ok=True)
         outfile = folder / f"tweets_{datetime.utcnow():%Y%m%d_%H%M%S}.jsonl"
         seen=set(); total=0
+        # Mirror of the newest ids, capped so the serialized evaluate() arg
+        # stays small — old ids never reappear once the viewport moves on.
+        recent=deque(maxlen=2000)
+
+        # One fd for the whole scrape, written with a single os.write per
+        # scroll: no io-layer buffer copy, and O_APPEND writes land whole
+        # lines atomically so the /feed tail reader never sees torn records.
+        fd = os.open(str(outfile), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            zero_streak = 0    # consecutive scrolls with nothing new
+            since_recycle = 0  # scrolls that added depth since the last recycle
+            catchup_left = 0   # post-recycle scrolls spent regaining lost depth
+            s = 0
+            while s < scrolls:
+                # Chromium accumulates detached DOM nodes over a long
+                # session; cycle the context once enough net-new depth has
+                # accrued — counting raw iterations would charge the catch-up
+                # scrolls below and re-trigger right as the page regains the
+                # old depth. The seen set keeps the output duplicate-free.
+                if since_recycle >= CTX_RECYCLE_SCROLLS:
+                    log.info("[%s] recycling context at scroll %d", account, s)
+                    await close_context(ctx, account); ctx = None
+                    ctx = await get_context(account, headless)
+                    page = await open_timeline(ctx, account, url, feed)
+                    if page is None:
+                        break
+                    since_recycle = 0
+                    # the fresh page restarts at the top: the next viewport-
+                    # fulls are all previously-seen tweets, so scroll through
+                    # them without charging the budget or the exhaustion
+                    # counter until something unseen renders again
+                    catchup_left = CTX_RECYCLE_SCROLLS * 3
+                res = await run_step(page, {"seen": list(recent), "maxClicks": SHOWMORE_MAX})
+                if res["clicks"]:
+                    log.debug("[%s] expanded %d show‑more", account, res["clicks"])
+                new_lines=[]
+                # columns (SoA) instead of per-tweet dicts: the CDP payload
+                # carries each key name once per scroll, not once per tweet
+                for id_, user, content, ts_, is_rt, ret_by, href in zip(
+                        res["ids"], res["usernames"], res["contents"],
+                        res["timestamps"], res["isRetweets"],
+                        res["retweetedBys"], res["tweetUrls"]):
+                    tid=id_ or f"{user}_{ts_}"
+                    if tid in seen: continue
+                    seen.add(tid); recent.append(tid); total+=1
+                    new_lines.append(jsonl_line({
+                        "id": id_, "username": user, "content": content,
+                        "timestamp": ts_, "is_retweet": bool(is_rt),
+                        "retweeted_by": ret_by, "tweet_url": href,
+                    }))
+                if new_lines:
+                    # keep the loop free for other scrapes while the batch
+                    # hits disk; O_APPEND keeps the write itself atomic
+                    await asyncio.to_thread(os.write, fd, b"".join(new_lines))
+                    zero_streak = 0
+                    since_recycle += 1
+                    catchup_left = 0
+                elif catchup_left:
+                    # still re-covering old ground after a recycle; an empty
+                    # scroll here is expected, not a sign of exhaustion
+                    catchup_left -= 1
+                    if not catchup_left:
+                        log.info("[%s] nothing unseen after post-recycle catch-up – stopping",
+                                 account)
+                        break
+                else:
+                    zero_streak += 1
+                    if zero_streak >= EXHAUSTED_AFTER:
+                        log.info("[%s] feed exhausted after %d empty scrolls – stopping early",
+                                 account, zero_streak)
+                        break
+                if not catchup_left:
+                    s += 1
+                    log.info("[%s] scroll %d/%d  +%d (total %d)", account, s, scrolls, len(new_lines), total)
+                # return as soon as new articles render instead of a flat 2s;
+                # the timeline virtualizes offscreen nodes, so cap the wait
+                try:
+                    await page.wait_for_function(
+                        f"document.querySelectorAll('article').length > {res['count']}",
+                        timeout=5000)
+                except PWTimeout:
+                    pass
+        finally:
+            os.close(fd)
 
-        for s in range(scrolls):
-            # expand "Show more" buttons first
-            clicks = page.evaluate(JS_EXPAND_SHOWMORE, SHOWMORE_MAX)
-            if clicks:
-                log.debug("[%s] expanded %d show‑more", account, clicks)
-                time.sleep(1.5)  # let new content load
-
-            tweets = page.evaluate(extractor)
-            new=0
-            for t in tweets:
-                tid=t.get('id') or f"{t['username']}_{t['timestamp']}";
-                if tid in seen: continue
-                seen.add(tid); new+=1; total+=1
-                write_jsonl(outfile,t)
-            log.info("[%s] scroll %d/%d  +%d (total %d)", account, s+1, scrolls, new, total)
-            page.evaluate("window.scrollBy(0,1800)"); time.sleep(1.6)
-
-        ctx.close(); pw.stop()
+        await close_context(ctx, account); ctx = None
         log.info("[%s] done – %d tweets", account, total)
     except Exception as e:
         log.exception("[%s] fatal: %s", account, e)
+        if ctx is not None:
+            try:
+                await ctx.close()
+            except Exception:
+                pass
+
+
+async def close_context(ctx, account: str):
+    """Persist the account's login before letting the context go."""
+    try:
+        await ctx.storage_state(path=str(state_path(account)))
+    except Exception:
+        log.warning("[%s] could not persist auth state", account)
+    await ctx.close()
 
 # ─────────────────── Tiny Flask UI ───────────────────
 app = Flask(__name__)
@@ -189,27 +514,127 @@ def index():
         feed      = request.form['feed']
         scrolls   = int(request.form.get('scroll', SCROLLS_DEFAULT))
         headless  = HEADLESS_DEFAULT
-        key       = f"{acct}_{feed}"
-        if key not in SCRAPE_PROCS or not SCRAPE_PROCS[key].is_alive():
-            p = Process(target=scrape_worker, args=(acct,feed,scrolls,headless), daemon=True)
-            p.start(); SCRAPE_PROCS[key]=p
+        # snapshot: the reaper thread pops entries while we iterate
+        active = sum(1 for f in list(SCRAPE_JOBS.values()) if not f.done())
+        if active >= MAX_SCRAPES * 2:
+            return "too many active scrapes – try again later", 503
+        start_scrape(acct, feed, scrolls, headless)
         return redirect(url_for('view', account=acct, feed=feed))
     return INDEX
 
-@app.route('/feed/<account>/<feed>')
-def view(account, feed):
+# Incremental /feed reader: parse only the bytes appended since the last
+# request instead of re-parsing the whole file on every 6s refresh.
+_feed_cache: dict[Path, tuple[int, list[dict]]] = {}
+_feed_lock = threading.Lock()
+
+
+def read_tweets(latest: Path) -> list[dict]:
+    with _feed_lock:
+        offset, tweets = _feed_cache.get(latest, (0, []))
+        with latest.open('rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+        # only consume complete lines; a partially-flushed tail is re-read next time
+        end = chunk.rfind(b'\n') + 1
+        for ln in chunk[:end].splitlines():
+            if not ln:
+                continue
+            # skip corrupt lines: raising here would leave the offset
+            # uncommitted and re-append the good lines on every request
+            try:
+                d = jsonl_loads(ln)
+            except Exception:
+                continue
+            # a feed has few unique authors; intern so the cached list holds
+            # one str object per author instead of one per occurrence
+            if d.get("username"):
+                d["username"] = sys.intern(d["username"])
+            if d.get("retweeted_by"):
+                d["retweeted_by"] = sys.intern(d["retweeted_by"])
+            tweets.append(d)
+        _feed_cache[latest] = (offset + end, tweets)
+        return tweets
+
+
+# Compiled once at import — render_template_string would re-lex/parse the
+# Jinja source on every hit, and the refresh loop hammers /feed while live.
+# Head and row are separate so the response can stream instead of building
+# one giant HTML string in memory.
+_FEED_HEAD = app.jinja_env.from_string("""
+<meta http-equiv='refresh' content='6'>
+<h2>{{ account }} · {{ feed }} ({{ count }})</h2><a href='/'>Back</a>
+{%- if page > 0 %} <a href='?page={{ page - 1 }}&size={{ size }}'>Newer</a>{% endif %}
+{%- if more %} <a href='?page={{ page + 1 }}&size={{ size }}'>Older</a>{% endif %}
+<table border=1 cellpadding=4>""")
+_FEED_ROWS = app.jinja_env.from_string("""
+{%- for t in tweets %}
+<tr><td>{{ t['timestamp'] }}</td><td>@{{ t['username'] }}</td><td>{{ t['content'][:140] }}</td></tr>
+{%- endfor %}""")
+FEED_CHUNK = 200   # rows per streamed chunk
+FEED_SIZE  = 200   # default rows per page
+FEED_SIZE_MAX = 1000
+
+
+# Latest-file pointer per (account, feed): the glob+sort only changes when
+# the scraper opens a new output file, which also bumps the dir mtime.
+_latest_cache: dict[tuple[str, str], tuple[float, Path]] = {}
+
+
+def latest_file(account: str, feed: str) -> Path | None:
     folder = Path(f"{account}_{feed}")
-    files  = sorted(folder.glob('tweets_*.jsonl'))
+    try:
+        mtime = folder.stat().st_mtime
+    except OSError:
+        return None
+    cached = _latest_cache.get((account, feed))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    files = sorted(folder.glob('tweets_*.jsonl'))
     if not files:
+        return None
+    if cached and cached[1] != files[-1]:
+        # the scraper rotated to a new output file; drop the superseded
+        # file's parsed tweets so the cache doesn't pin every past scrape
+        with _feed_lock:
+            _feed_cache.pop(cached[1], None)
+    _latest_cache[(account, feed)] = (mtime, files[-1])
+    return files[-1]
+
+
+@app.route('/feed/<account>/<feed>')
+def view(account, feed):
+    latest = latest_file(account, feed)
+    if latest is None:
         return f"<p>No data yet for {account} {feed}. <a href='/'>Back</a>"
-    latest = files[-1]
-    tweets = [json.loads(l) for l in latest.open(encoding='utf‑8')]
-    tweets.sort(key=lambda t: t['timestamp'], reverse=True)
-    rows = "".join(f"<tr><td>{t['timestamp']}</td><td>@{t['username']}</td><td>{t['content'][:140]}</td></tr>" for t in tweets)
-    return f"""
-    <meta http-equiv='refresh' content='6'>
-    <h2>{account} · {feed} ({len(tweets)})</h2><a href='/'>Back</a>
-    <table border=1 cellpadding=4>{rows}</table>"""
+    tweets = read_tweets(latest)
+    # Scroll batches land roughly newest-first already; only pay for the
+    # O(n log n) sort when the file actually is out of order. Sort a copy:
+    # the returned list is the one cached in _feed_cache, and sorting it in
+    # place would race concurrent appends (list.sort raises if the list is
+    # modified during the sort) and destroy the append-order the fast path
+    # above depends on.
+    ts = [t['timestamp'] for t in tweets]
+    if any(a < b for a, b in zip(ts, ts[1:])):
+        tweets = sorted(tweets, key=lambda t: t['timestamp'], reverse=True)
+
+    # render one page of rows, not the whole history
+    try:
+        pg   = max(0, int(request.args.get('page', 0)))
+        size = min(FEED_SIZE_MAX, max(1, int(request.args.get('size', FEED_SIZE))))
+    except ValueError:
+        pg, size = 0, FEED_SIZE
+    start = pg * size
+    subset = tweets[start:start + size]
+    more = start + size < len(tweets)
+
+    def gen():
+        yield _FEED_HEAD.render(account=account, feed=feed, count=len(tweets),
+                                page=pg, size=size, more=more)
+        for i in range(0, len(subset), FEED_CHUNK):
+            yield _FEED_ROWS.render(tweets=subset[i:i+FEED_CHUNK])
+        yield "\n</table>"
+
+    return Response(stream_with_context(gen()), mimetype="text/html")
 
 # ─────────────────── Entrypoint ───────────────────
 if __name__ == '__main__':
@@ -218,8 +643,25 @@ if __name__ == '__main__':
         acct   = sys.argv[1]
         feed   = sys.argv[2] if len(sys.argv)>=3 else 'home'
         scroll = int(sys.argv[3]) if len(sys.argv)>=4 else SCROLLS_DEFAULT
-        scrape_worker(acct, feed, scroll, HEADLESS_DEFAULT)
+
+        async def _cli():
+            try:
+                await scrape_worker(acct, feed, scroll, HEADLESS_DEFAULT)
+            finally:
+                await shutdown_playwright()
+
+        asyncio.run(_cli())
     else:
         port = int(os.getenv('PORT', 5000))
+        threading.Thread(target=reap_jobs, daemon=True).start()
         log.info("Flask UI → http://127.0.0.1:%d", port)
-        app.run(port=port, debug=False)
+        # Werkzeug's dev server serializes /feed polls behind each other;
+        # run under uvicorn (via the WSGI→ASGI bridge) when available.
+        try:
+            import uvicorn
+            from asgiref.wsgi import WsgiToAsgi
+            uvicorn.run(WsgiToAsgi(app), host="127.0.0.1", port=port,
+                        log_level=LOG_LVL.lower())
+        except ImportError:
+            log.info("uvicorn/asgiref not installed – falling back to the dev server")
+            app.run(port=port, debug=False, threaded=True)
@@ -1,287 +1,887 @@
-import time
-import json
-import requests
-import re
-import threading
-from pathlib import Path
-from flask import Flask, request, redirect, url_for, render_template_string
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-
-app = Flask(__name__)
-scrape_threads = {}
-
-def strip_think_tags(text):
-    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
-
-def extract_json_content(text: str):
-    text = re.sub(r'^```(?:json)?|```$', '', text.strip(), flags=re.IGNORECASE).strip()
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        print("[JSON ERROR] Failed to parse LLM response:")
-        print(text)
-        print(f"Error: {e}")
-        return None
-
-def format_time(seconds: float) -> str:
-    m = int(seconds // 60)
-    s = int(seconds % 60)
-    return f"{m:02}:{s:02}"
-
-def generate_overall_report(account_name, summary_path, output_path):
-    summaries = []
-    try:
-        with open(summary_path, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    summaries.append(json.loads(line))
-                except:
-                    continue
-    except FileNotFoundError:
-        print("[REPORT] No summary file found.")
-        return
-
-    if not summaries:
-        print("[REPORT] No summaries to process.")
-        return
-
-    prompt = (
-        "You are a narrative analyst. Given the following set of summary reports, "
-        "produce a comprehensive meta-narrative about this account's behavior. Highlight attention, themes, changes in tone, and any psychological or strategic patterns. "
-        "Do not summarize each block; synthesize trends across all of them.\n\n"
-    )
-    summaries_str = "\n\n".join(f"Summary:\n{entry['summary']}" for entry in summaries)
-    messages = [
-        {"role": "user", "content": prompt + summaries_str}
-    ]
-    payload = {
-        "model": "deepseek-r1-distill-llama-8b-abliterated",
-        "messages": messages,
-        "temperature": 0.7,
-        "max_tokens": 4096,
-        "stream": False
-    }
-    try:
-        res = requests.post("http://127.0.0.1:1234/v1/chat/completions", json=payload)
-        res.raise_for_status()
-        result = res.json()
-        content = result["choices"][0]["message"]["content"].strip()
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(content)
-        print("[REPORT] Meta-narrative report saved to", output_path)
-    except Exception as e:
-        print(f"[REPORT ERROR] Failed to generate meta summary: {e}")
-
-def scrape_and_comment(account_name: str, model: str = "deepseek-r1-distill-llama-8b-abliterated", api_url: str = "http://127.0.0.1:1234/v1/chat/completions", rolling_context_length: int = 10, total_scrolls: int = 50, scroll_delay: float = 2.5):
-    subfolder = Path(account_name)
-    subfolder.mkdir(parents=True, exist_ok=True)
-    tweet_file = subfolder / "tweets.jsonl"
-    commentary_file = subfolder / "commentary.jsonl"
-    summary_file = subfolder / "summary.jsonl"
-    report_file = subfolder / "meta_summary.txt"
-
-    tweet_file.touch(exist_ok=True)
-    commentary_file.touch(exist_ok=True)
-    summary_file.touch(exist_ok=True)
-
-    x_replies_url = f"https://x.com/{account_name}/with_replies"
-    context = [{"role": "user", "content": ""}]
-    summary_prompt = (
-        "The following tweets are from a public account, arranged in chronological order. Write a single narrative paragraph that captures shifts in tone, rhetorical strategy, and attention. "
-        "Highlight bias, contradictions, or strategic intent. Avoid listing or rephrasing each tweet. This should feel like you're tracing a person's thinking or narrative arc over time.\n\n"
-    )
-
-    seen_timestamps = set()
-    with commentary_file.open("r", encoding="utf-8") as cf:
-        for line in cf:
-            try:
-                obj = json.loads(line)
-                ts = obj.get("timestamp")
-                if ts:
-                    seen_timestamps.add(ts)
-            except:
-                continue
-
-    block_tweets = []
-    profile_dir = Path(".chromium-profile").resolve()
-    profile_dir.mkdir(parents=True, exist_ok=True)
-    start_time = time.time()
-    total_collected = 0
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch_persistent_context(
-            user_data_dir=str(profile_dir),
-            headless=False,
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-        page = browser.pages[0] if browser.pages else browser.new_page()
-        page.goto(x_replies_url, timeout=60000)
-        time.sleep(5)
-
-        scrolls_done = 0
-        while scrolls_done < total_scrolls:
-            page.mouse.wheel(0, 3000)
-            time.sleep(scroll_delay)
-            scrolls_done += 1
-            tweets = page.locator("article").all()
-
-            for tweet in tweets:
-                try:
-                    timestamp = tweet.locator("time").nth(0).get_attribute("datetime")
-                    if not timestamp or timestamp in seen_timestamps:
-                        continue
-
-                    from_user = ""
-                    try:
-                        anchor = tweet.locator("a[role='link'][href^='/']").first
-                        href = anchor.get_attribute("href")
-                        if href and len(href.split("/")) == 2:
-                            from_user = href.replace("/", "").strip()
-                    except:
-                        pass
-
-                    content = tweet.locator("div[lang]").nth(0).inner_text(timeout=3000).strip()
-                    if not content:
-                        continue
-
-                    seen_timestamps.add(timestamp)
-                    tweet_dict = {
-                        "timestamp": timestamp,
-                        "from_user": from_user,
-                        "content": content
-                    }
-                    with tweet_file.open("a", encoding="utf-8") as tf:
-                        tf.write(json.dumps(tweet_dict, ensure_ascii=False) + "\n")
-                    total_collected += 1
-
-                    user_msg = f"[{timestamp}] Tweet from @{from_user or 'someone'}:\n{content}\nWrite a brief psychological or strategic interpretation."
-                    context.append({"role": "user", "content": user_msg})
-                    if len(context) > (rolling_context_length + 1):
-                        context = [context[0]] + context[-rolling_context_length:]
-
-                    payload = {
-                        "model": model,
-                        "messages": context,
-                        "temperature": 0.8,
-                        "max_tokens": 1024,
-                        "stream": False
-                    }
-
-                    res = requests.post(api_url, json=payload)
-                    res.raise_for_status()
-                    llm_raw = res.json()["choices"][0]["message"]["content"]
-                    commentary = llm_raw.strip()
-                    context.append({"role": "assistant", "content": commentary})
-
-                    out_dict = {
-                        "timestamp": timestamp,
-                        "from_user": from_user,
-                        "content": content,
-                        "llm_commentary": commentary
-                    }
-                    with commentary_file.open("a", encoding="utf-8") as cf:
-                        cf.write(json.dumps(out_dict, ensure_ascii=False) + "\n")
-                    block_tweets.append(out_dict)
-
-                    if len(block_tweets) >= 10:
-                        block_tweets.sort(key=lambda x: x["timestamp"])
-                        summary_prompt_block = summary_prompt + "\n\n" + "\n\n".join(
-                            f"[{item['timestamp']}] @{item['from_user']} tweeted:\n{item['content']}\nLLM Commentary:\n{strip_think_tags(item['llm_commentary'])}"
-                            for item in block_tweets)
-                        summary_payload = {
-                            "model": model,
-                            "messages": [
-                                {"role": "user", "content": summary_prompt_block}
-                            ],
-                            "temperature": 0.7,
-                            "max_tokens": 2048,
-                            "stream": False
-                        }
-                        res_sum = requests.post(api_url, json=summary_payload)
-                        res_sum.raise_for_status()
-                        sum_text = res_sum.json()["choices"][0]["message"]["content"].strip()
-                        with summary_file.open("a", encoding="utf-8") as sf:
-                            sf.write(json.dumps({
-                                "block_tweets": [item["timestamp"] for item in block_tweets],
-                                "summary": sum_text,
-                                "generated_at": format_time(time.time() - start_time)
-                            }, ensure_ascii=False) + "\n")
-                        block_tweets = []
-                except Exception as e:
-                    print(f"[ERROR] tweet error: {e}")
-                    continue
-
-        browser.close()
-
-    generate_overall_report(account_name, summary_file, report_file)
-    print(f"[DONE] {total_collected} tweets processed. Final report saved to: {report_file}")
-
-@app.route("/", methods=["GET", "POST"])
-def index():
-    if request.method == "POST":
-        account = request.form.get("account_name", "").strip()
-        if not account:
-            return "<p>Invalid account name.</p>"
-        if account not in scrape_threads or not scrape_threads[account].is_alive():
-            t = threading.Thread(target=scrape_and_comment, args=(account,))
-            t.start()
-            scrape_threads[account] = t
-        return redirect(url_for("feed", account_name=account, live="1"))
-    return """
-    <html><body>
-    <form method="POST">
-        <label>Account:</label><input name="account_name" required>
-        <button>Start</button>
-    </form>
-    </body></html>
-    """
-
-@app.route("/feed/<account_name>")
-def feed(account_name):
-    live = request.args.get("live", "0")
-    subfolder = Path(account_name)
-    commentary_file = subfolder / "commentary.jsonl"
-    summary_file = subfolder / "summary.jsonl"
-
-    if not commentary_file.exists():
-        return f"<p>No data found for {account_name}.</p>"
-
-    feed_data, summaries = [], []
-    with commentary_file.open("r", encoding="utf-8") as cf:
-        for line in cf:
-            try:
-                feed_data.append(json.loads(line))
-            except:
-                continue
-
-    if summary_file.exists():
-        with summary_file.open("r", encoding="utf-8") as sf:
-            for line in sf:
-                try:
-                    summaries.append(json.loads(line))
-                except:
-                    continue
-
-    feed_data.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    summaries.sort(key=lambda x: x.get("generated_at", ""))
-
-    if account_name in scrape_threads and not scrape_threads[account_name].is_alive():
-        live = "0"
-
-    return render_template_string("""
-    <html><body><h1>{{account_name}}</h1>
-    {% if live == "1" %}
-        <p><i>Scraping in progress...</i></p>
-    {% endif %}
-    {% for item in feed_data %}
-    <div><b>[{{item.timestamp}}] @{{item.from_user}}</b>: {{item.content}}<br><i>{{ strip_think_tags(item.llm_commentary) }}</i></div>
-    {% endfor %}
-    <hr>
-    {% for sum in summaries %}
-    <div><b>Summary Block ({{sum.block_tweets[0]}} → {{sum.block_tweets[-1]}}):</b><br>{{sum.summary}}</div>
-    {% endfor %}
-    </body></html>
-    """, account_name=account_name, feed_data=feed_data, summaries=summaries, live=live, strip_think_tags=strip_think_tags)
-
-if __name__ == "__main__":
-    app.run(debug=True, port=5000, use_reloader=False)
+"""Rolling X/Twitter scrape-and-comment pipeline.
+
+Scrapes an account's timeline through a shared headful/headless Chromium,
+feeds tweets to a local LM Studio backend for per-tweet commentary and
+block summaries, and serves the results through a small Flask UI.
+
+Performance note: this module is network/IO bound, not CPU bound. The
+dominant per-tweet costs are the LLM round-trip (seconds), Playwright CDP
+round-trips (milliseconds), and file syscalls. All optimization here
+targets I/O batching, connection reuse, and prompt-prefix stability —
+SIMD/Numba-style CPU work does not apply and should not be proposed.
+"""
+
+import asyncio
+import atexit
+import heapq
+import os
+import time
+from bisect import insort
+from operator import itemgetter
+import hashlib
+import json
+import queue
+import shelve
+import requests
+import re
+import threading
+from pathlib import Path
+from flask import Flask, Response, request, redirect, stream_with_context, url_for
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+app = Flask(__name__)
+# account -> concurrent.futures.Future for the scrape_and_comment coroutine;
+# claim the slot under the lock before scheduling — two workers on one
+# account would share commentary.jsonl and the llm_cache shelf
+scrape_jobs = {}
+_jobs_lock = threading.Lock()
+
+# orjson parses a few times faster than stdlib json; fall back so the
+# script stays dep-light (same pattern as 425homescrape.py).
+try:
+    import orjson
+    jsonl_loads = orjson.loads
+
+    def jsonl_line(obj):
+        return orjson.dumps(obj) + b"\n"
+except ImportError:
+    jsonl_loads = json.loads
+
+    def jsonl_line(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
+
+# Incremental JSONL caches: these files are append-only, so instead of
+# re-reading from byte 0 on every feed GET we remember the parse position
+# and only consume bytes appended since last time.
+_jsonl_cache = {}
+_jsonl_lock = threading.Lock()
+
+def read_jsonl(path):
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return []
+    key = str(path)
+    with _jsonl_lock:
+        pos, items = _jsonl_cache.get(key, (0, []))
+        if size < pos:
+            pos, items = 0, []
+        if size > pos:
+            with open(path, "rb") as f:
+                f.seek(pos)
+                chunk = f.read()
+            end = chunk.rfind(b"\n") + 1
+            for ln in chunk[:end].splitlines():
+                if not ln:
+                    continue
+                try:
+                    items.append(jsonl_loads(ln))
+                except Exception:
+                    continue
+            _jsonl_cache[key] = (pos + end, items)
+        return items
+
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+def strip_think_tags(text):
+    if "<think>" not in text:
+        return text
+    return _THINK_RE.sub("", text)
+
+_FENCE_RE = re.compile(r'^```(?:json)?|```$', re.IGNORECASE)
+
+def extract_json_content(text: str):
+    text = _FENCE_RE.sub('', text.strip()).strip()
+    try:
+        return jsonl_loads(text)
+    except (ValueError, TypeError) as e:
+        print("[JSON ERROR] Failed to parse LLM response:")
+        print(text)
+        print(f"Error: {e}")
+        return None
+
+def format_time(seconds: float) -> str:
+    m, s = divmod(int(seconds), 60)
+    return f"{m:02}:{s:02}"
+
+# every SUPER_BLOCK block summaries get compressed into one super-summary, so
+# the meta-report prompt grows with log-ish tiers instead of linearly with
+# session length
+SUPER_BLOCK = 10
+
+_COMPACT_PROMPT = (
+    "Condense the following block summaries into a single dense summary. Preserve the "
+    "timeline, dominant themes, and any shifts in tone or strategy; drop repetition.\n\n"
+)
+
+def generate_overall_report(account_name, summary_path, output_path,
+                            model="deepseek-r1-distill-llama-8b-abliterated",
+                            api_url="http://127.0.0.1:1234/v1/chat/completions"):
+    summary_path = Path(summary_path)
+    if not summary_path.exists():
+        print("[REPORT] No summary file found.")
+        return
+    blocks = read_jsonl(summary_path)
+
+    if not blocks:
+        print("[REPORT] No summaries to process.")
+        return
+
+    super_path = summary_path.parent / "super_summary.jsonl"
+    supers = list(read_jsonl(super_path))
+    compacted = sum(s.get("covers", 0) for s in supers)
+
+    session = make_llm_session()
+    cache = shelve.open(str(summary_path.parent / "llm_cache"))
+    try:
+        # fold finished groups of block summaries into super-summaries first
+        while len(blocks) - compacted >= SUPER_BLOCK:
+            group = blocks[compacted:compacted + SUPER_BLOCK]
+            payload = {
+                "model": model,
+                "messages": [
+                    {"role": "user", "content": _COMPACT_PROMPT + "\n\n".join(
+                        f"Summary:\n{entry['summary']}" for entry in group)}
+                ],
+                "temperature": 0.7,
+                "max_tokens": 1024,
+                "stream": False
+            }
+            try:
+                sum_text = _cached_completion(cache, session, api_url, payload).strip()
+            except Exception as e:
+                print(f"[REPORT ERROR] compaction failed: {e}")
+                break
+            entry = {"covers": SUPER_BLOCK, "summary": sum_text}
+            with super_path.open("ab") as f:
+                f.write(jsonl_line(entry))
+            supers.append(entry)
+            compacted += SUPER_BLOCK
+
+        prompt = (
+            "You are a narrative analyst. Given the following set of summary reports, "
+            "produce a comprehensive meta-narrative about this account's behavior. Highlight attention, themes, changes in tone, and any psychological or strategic patterns. "
+            "Do not summarize each block; synthesize trends across all of them.\n\n"
+        )
+        # super-summaries (bounded) plus the uncompacted tail, not every block
+        entries = supers + blocks[compacted:]
+        summaries_str = "\n\n".join(f"Summary:\n{entry['summary']}" for entry in entries)
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "user", "content": prompt + summaries_str}
+            ],
+            "temperature": 0.7,
+            # budget output to the input size instead of always asking for 4096
+            "max_tokens": min(4096, 512 + 64 * len(entries)),
+            "stream": True
+        }
+        try:
+            _stream_to_file(cache, session, api_url, payload, output_path)
+            print("[REPORT] Meta-narrative report saved to", output_path)
+        except Exception as e:
+            print(f"[REPORT ERROR] Failed to generate meta summary: {e}")
+    finally:
+        cache.close()
+
+# All Playwright work runs on one asyncio loop in a daemon thread, sharing a
+# single persistent Chromium: one page per account instead of one ~200MB
+# browser process per account (same model as 425homescrape.py).
+MAX_CONCURRENT_SCROLLERS = 3
+
+# HEADLESS=1 for production; default stays visible so a first run can log in.
+HEADLESS = os.getenv("HEADLESS", "0") == "1"
+CHROMIUM_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# the scraper only reads DOM text — images, video and fonts are wasted
+# bytes and decode CPU (same resource-type blocking as 425homescrape.py)
+BLOCKED_RESOURCES = {"image", "media", "font"}
+# tracker/beacon hosts ride on xhr/fetch, so the resource-type check alone
+# lets them through; match on URL substrings instead
+ANALYTICS_HINTS = ("google-analytics", "doubleclick", "ads-twitter", "branch.io", "/i/jot")
+
+async def _block_media(route):
+    if (route.request.resource_type in BLOCKED_RESOURCES
+            or any(h in route.request.url for h in ANALYTICS_HINTS)):
+        await route.abort()
+    else:
+        await route.continue_()
+
+_loop = None
+_loop_lock = threading.Lock()
+_pw = None
+_browser_ctx = None
+_browser_lock = asyncio.Lock()
+_scroll_sem = asyncio.Semaphore(MAX_CONCURRENT_SCROLLERS)
+
+def get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+        return _loop
+
+async def get_browser_context():
+    global _pw, _browser_ctx
+    async with _browser_lock:
+        if _browser_ctx is None:
+            _pw = await async_playwright().start()
+            profile_dir = Path(".chromium-profile").resolve()
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            _browser_ctx = await _pw.chromium.launch_persistent_context(
+                user_data_dir=str(profile_dir),
+                headless=HEADLESS,
+                service_workers="block",
+                args=CHROMIUM_ARGS
+            )
+            await _browser_ctx.route("**/*", _block_media)
+        return _browser_ctx
+
+async def _shutdown_browser():
+    global _pw, _browser_ctx
+    if _browser_ctx is not None:
+        await _browser_ctx.close()
+        _browser_ctx = None
+    if _pw is not None:
+        await _pw.stop()
+        _pw = None
+
+def _shutdown_at_exit():
+    # persistent context: closing cleanly is what flushes profile state to disk
+    if _loop is None or (_browser_ctx is None and _pw is None):
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_shutdown_browser(), _loop).result(timeout=10)
+    except Exception:
+        pass
+
+atexit.register(_shutdown_at_exit)
+
+SHOWMORE_MAX = 20
+# consecutive scrolls with zero new tweets before we call the timeline done
+EXHAUSTED_AFTER = 3
+
+# Expand truncated tweets entirely in-page: one evaluate clicks every
+# "Show more" button instead of a Python-side count()/nth(i).click() loop
+# (one CDP round-trip per button). Same approach as 425homescrape.py.
+JS_EXPAND_SHOWMORE = """
+(maxClicks) => {
+    const SM_RE = /show more/i;
+    let clicks = 0;
+    for (const b of document.querySelectorAll("[role='button']")) {
+        if (clicks >= maxClicks) break;
+        if (SM_RE.test(b.textContent || "") && !b.closest("a[href*='/i/grok/share/']")) {
+            b.click();
+            clicks++;
+        }
+    }
+    return clicks;
+}
+"""
+
+# One evaluate per scroll returns every visible tweet at once, instead of
+# several CDP round-trips (locator/count/get_attribute/inner_text) per article.
+JS_EXTRACT_TWEETS = """
+() => {
+    const out = [];
+    for (const art of document.querySelectorAll("article")) {
+        const t = art.querySelector("time");
+        if (!t) continue;
+        const ts = t.getAttribute("datetime");
+        if (!ts) continue;
+        const body = art.querySelector("div[lang]");
+        const content = body ? body.innerText.trim() : "";
+        if (!content) continue;
+        let fromUser = "";
+        for (const a of art.querySelectorAll("a[role='link'][href^='/']")) {
+            const href = a.getAttribute("href");
+            if (href && href.split("/").length === 2) {
+                fromUser = href.slice(1).trim();
+                break;
+            }
+        }
+        out.push({timestamp: ts, from_user: fromUser, content: content});
+    }
+    return out;
+}
+"""
+
+LLM_BATCH = 8
+BATCH_FLUSH_SECS = 10.0
+
+# static instructions live in the system message so every byte up to the tweet
+# bodies is identical call-to-call — prefix-cache friendly, and user turns
+# carry only the delta
+COMMENTARY_SYSTEM = (
+    "For each tweet in the user message, write a brief psychological or strategic "
+    "interpretation. Reply with exactly one numbered entry per tweet, formatted "
+    "'Tweet N: ...'."
+)
+_BATCH_REPLY_RE = re.compile(r"^\s*Tweet\s*(\d+)\s*[:.)\-]\s*", re.IGNORECASE | re.MULTILINE)
+
+# Character ceiling for the retained history when compacting (~4 chars/token,
+# so roughly a 2k-token prefill bound regardless of how long the assistant's
+# commentary turns ran).
+CONTEXT_CHAR_BUDGET = 8000
+
+def _trim_context(context, rolling_context_length):
+    """Keep the system message plus the newest turns within the char budget.
+
+    Message-count slicing alone let ten maximum-length commentary turns blow
+    the prefill out to tens of thousands of tokens; bounding by characters
+    keeps LLM latency stable. The count cap still applies on top.
+    """
+    kept = []
+    budget = CONTEXT_CHAR_BUDGET
+    for m in reversed(context[-rolling_context_length:]):
+        budget -= len(m["content"])
+        if budget < 0 and kept:
+            break
+        kept.append(m)
+    kept.reverse()
+    return [context[0]] + kept
+
+# (connect, read) — generation on a loaded local backend can take minutes
+LLM_TIMEOUT = (5, 300)
+
+SEEN_TAIL_BYTES = 2_000_000
+
+# matches both orjson ("timestamp":"...") and stdlib ("timestamp": "...") output
+_TIMESTAMP_RE = re.compile(rb'"timestamp":\s*"([^"]+)"')
+
+def _rehydrate_seen(commentary_file):
+    """Rebuild the dedup set from the tail of commentary.jsonl only.
+
+    A scroll session can only collide with recent history, so scanning the
+    last couple of MB is enough; reading a multi-day file from byte 0 just
+    to rebuild a set made startup O(file size). The timestamp field is
+    pulled with one C-level regex sweep instead of a JSON parse per line,
+    and stored as 64-bit hashes rather than the ISO8601 strings — same O(1)
+    membership at a third of the memory.
+    """
+    try:
+        size = commentary_file.stat().st_size
+    except FileNotFoundError:
+        return set()
+    with commentary_file.open("rb") as f:
+        if size > SEEN_TAIL_BYTES:
+            f.seek(size - SEEN_TAIL_BYTES)
+            f.readline()  # discard the partial line
+        data = f.read()
+    return {hash(ts.decode()) for ts in _TIMESTAMP_RE.findall(data)}
+
+def _payload_key(payload):
+    return hashlib.sha256(json.dumps(
+        {"m": payload["model"], "msgs": payload["messages"], "t": payload["temperature"]},
+        sort_keys=True).encode()).hexdigest()
+
+def _content_key(t):
+    """Shelf key for a tweet's (author, text) pair.
+
+    Retweets and copy-pasta repeat the exact same content under different
+    timestamps; keying on the content alone lets the worker reuse the
+    commentary instead of generating it again.
+    """
+    digest = hashlib.blake2b(
+        f"{t['from_user']}\n{t['content']}".encode(), digest_size=16).hexdigest()
+    return "content:" + digest
+
+# shelve handles are not safe for concurrent access; the worker thread and
+# its background summary threads share one shelf per account
+_cache_lock = threading.Lock()
+
+def _cached_completion(cache, session, api_url, payload):
+    """POST a chat completion, memoized on (model, messages, temperature).
+
+    The sampling temperature means a miss gives a fresh generation, but an
+    identical payload — e.g. re-running a crashed account — hits the shelf
+    instead of paying the model again.
+    """
+    key = _payload_key(payload)
+    if cache is not None:
+        with _cache_lock:
+            if key in cache:
+                return cache[key]
+    res = session.post(api_url, json=payload, timeout=LLM_TIMEOUT)
+    res.raise_for_status()
+    content = res.json()["choices"][0]["message"]["content"]
+    if cache is not None:
+        with _cache_lock:
+            cache[key] = content
+    return content
+
+def _stream_to_file(cache, session, api_url, payload, output_path):
+    """Stream a completion's SSE deltas straight into output_path.
+
+    Each delta is flushed as it arrives, so a crash mid-generation leaves a
+    usable partial report instead of nothing. The finished text is shelved
+    under the same key scheme as _cached_completion.
+    """
+    key = _payload_key(payload)
+    if cache is not None and key in cache:
+        content = cache[key]
+        with open(output_path, "w", encoding="utf-8") as out:
+            out.write(content)
+        return content
+    parts = []
+    with session.post(api_url, json=payload, stream=True, timeout=LLM_TIMEOUT) as res:
+        res.raise_for_status()
+        with open(output_path, "w", encoding="utf-8") as out:
+            for line in res.iter_lines():
+                if not line or not line.startswith(b"data: "):
+                    continue
+                data = line[6:]
+                if data == b"[DONE]":
+                    break
+                try:
+                    delta = jsonl_loads(data)["choices"][0]["delta"].get("content", "")
+                except Exception:
+                    continue
+                if delta:
+                    parts.append(delta)
+                    out.write(delta)
+                    out.flush()
+    content = "".join(parts).strip()
+    if cache is not None:
+        cache[key] = content
+    return content
+
+def make_llm_session():
+    """Pooled keep-alive session so repeated LM Studio calls skip the TCP handshake.
+
+    Retries cover the transient cases a busy local backend actually throws
+    (429 while another generation holds the slot, 5xx during model reload)
+    with backoff, instead of dropping the tweet batch.
+    """
+    s = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["POST"])
+    s.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry))
+    return s
+
+def _fmt_block_item(it):
+    return "[%s] @%s tweeted:\n%s\nLLM Commentary:\n%s" % (
+        it["timestamp"], it["from_user"], it["content"], it["llm_commentary"])
+
+_summary_write_lock = threading.Lock()
+
+def _emit_block(block_tweets, model, api_url, summary_prompt, sf, start_time, session, cache=None):
+    # caller keeps block_tweets timestamp-ordered via insort, so no sort here;
+    # strip <think> blocks in one regex pass over the joined text rather than
+    # once per item
+    block_str = _THINK_RE.sub("", "\n\n".join(map(_fmt_block_item, block_tweets)))
+    summary_prompt_block = summary_prompt + "\n\n" + block_str
+    summary_payload = {
+        "model": model,
+        "messages": [
+            {"role": "user", "content": summary_prompt_block}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 2048,
+        "stream": False
+    }
+    sum_text = _cached_completion(cache, session, api_url, summary_payload).strip()
+    # summary threads share the handle with the worker; keep each record whole
+    with _summary_write_lock:
+        sf.write(jsonl_line({
+            "block_tweets": [item["timestamp"] for item in block_tweets],
+            "summary": sum_text,
+            "generated_at": format_time(time.time() - start_time)
+        }))
+        sf.flush()
+
+def _emit_block_bg(block_tweets, model, api_url, summary_prompt, sf, start_time, cache):
+    """Thread target: generate a block summary without stalling the worker.
+
+    The summary is independent of the rolling commentary context, so its
+    2–5 s of decode overlaps the next commentary batch instead of
+    serializing in front of it. Each thread gets its own session — the
+    pooled session is not meant to be shared mid-request.
+    """
+    try:
+        _emit_block(block_tweets, model, api_url, summary_prompt, sf, start_time,
+                    make_llm_session(), cache)
+    except Exception as e:
+        print(f"[ERROR] block summary error: {e}")
+
+def llm_worker(account_name, tweet_queue, model, api_url, rolling_context_length, summary_prompt, commentary_file, summary_file, start_time):
+    session = make_llm_session()
+    context = [{"role": "system", "content": COMMENTARY_SYSTEM}]
+    block_tweets = []
+    summary_threads = []
+    pending = []
+    done = False
+    turns_since_reset = 0
+    # one buffered handle per file for the worker's lifetime instead of an
+    # open/close syscall pair per record
+    cf = commentary_file.open("ab", buffering=1 << 16)
+    sf = summary_file.open("ab", buffering=1 << 16)
+    cache = shelve.open(str(commentary_file.parent / "llm_cache"))
+    try:
+        while not done:
+            flush = False
+            try:
+                tweet_dict = tweet_queue.get(timeout=BATCH_FLUSH_SECS)
+                if tweet_dict is None:
+                    done = True
+                    flush = True
+                else:
+                    pending.append(tweet_dict)
+                    if len(pending) >= LLM_BATCH:
+                        flush = True
+            except queue.Empty:
+                flush = True
+            if not flush or not pending:
+                continue
+            batch, pending = pending, []
+            try:
+                # retweets/quotes repeat (from_user, content) verbatim — serve
+                # those from the content memo and only send the rest to the model
+                hits = {}
+                misses = []
+                for t in batch:
+                    ck = _content_key(t)
+                    with _cache_lock:
+                        hit = cache.get(ck)
+                    if hit is not None:
+                        hits[id(t)] = hit
+                    else:
+                        misses.append(t)
+
+                commentaries = {}
+                reply = ""
+                if misses:
+                    user_msg = "\n\n".join(
+                        f"Tweet {i}: [{t['timestamp']}] @{t['from_user'] or 'someone'}:\n{t['content']}"
+                        for i, t in enumerate(misses, 1))
+                    context.append({"role": "user", "content": user_msg})
+
+                    payload = {
+                        "model": model,
+                        "messages": context,
+                        "temperature": 0.8,
+                        "max_tokens": 1024 * len(misses),
+                        "stream": False
+                    }
+
+                    llm_raw = _cached_completion(cache, session, api_url, payload)
+                    # strip <think> before splitting: the reasoning block
+                    # rehearses line-initial 'Tweet N:' entries, and splitting
+                    # first would sever the tag pair and surface rehearsals as
+                    # commentary. Stripped here, the rolling context carries
+                    # only the real answer too.
+                    reply = strip_think_tags(llm_raw).strip()
+                    context.append({"role": "assistant", "content": reply})
+
+                    # Append-only between resets: trimming the window on every call
+                    # changed the message prefix each time and invalidated the
+                    # server's KV prefix cache. Let the context grow, then compact
+                    # once per ~rolling_context_length turns so the prefix stays
+                    # byte-stable (and cache-hot) between resets.
+                    turns_since_reset += 2
+                    if turns_since_reset > rolling_context_length * 2:
+                        context = _trim_context(context, rolling_context_length)
+                        turns_since_reset = 0
+
+                    parts = _BATCH_REPLY_RE.split(reply)
+                    for j in range(1, len(parts) - 1, 2):
+                        commentaries[int(parts[j])] = parts[j + 1].strip()
+
+                out_lines = []
+                miss_no = 0
+                for t in batch:
+                    if id(t) in hits:
+                        commentary = hits[id(t)]
+                    else:
+                        miss_no += 1
+                        if miss_no in commentaries:
+                            commentary = commentaries[miss_no]
+                            with _cache_lock:
+                                cache[_content_key(t)] = commentary
+                        else:
+                            # model ignored the numbered format; show the raw
+                            # reply for this record but never memoize it
+                            commentary = reply
+                    out_dict = {
+                        "timestamp": t["timestamp"],
+                        "from_user": t["from_user"],
+                        "content": t["content"],
+                        "llm_commentary": commentary
+                    }
+                    out_lines.append(jsonl_line(out_dict))
+                    insort(block_tweets, out_dict, key=itemgetter("timestamp"))
+                cf.write(b"".join(out_lines))
+                cf.flush()
+
+                if len(block_tweets) >= 10:
+                    # hand the full block to a thread and keep consuming; the
+                    # thread owns the list, the worker starts a fresh one
+                    st = threading.Thread(
+                        target=_emit_block_bg,
+                        args=(block_tweets, model, api_url, summary_prompt, sf, start_time, cache),
+                        daemon=True)
+                    st.start()
+                    summary_threads.append(st)
+                    summary_threads = [s for s in summary_threads if s.is_alive()]
+                    block_tweets = []
+            except Exception as e:
+                print(f"[ERROR] commentary batch error: {e}")
+                continue
+
+        for st in summary_threads:
+            st.join()
+        if block_tweets:
+            try:
+                _emit_block(block_tweets, model, api_url, summary_prompt, sf, start_time, session, cache)
+            except Exception as e:
+                print(f"[ERROR] final block summary error: {e}")
+    finally:
+        cache.close()
+        cf.close()
+        sf.close()
+
+
+async def _scrape(account_name, x_replies_url, tweet_file, tweet_queue, seen_timestamps, total_scrolls, scroll_delay):
+    ctx = await get_browser_context()
+    page = await ctx.new_page()
+    # one default instead of per-call timeout kwargs; navigation gets its own
+    page.set_default_timeout(3000)
+    page.set_default_navigation_timeout(60000)
+    total_collected = 0
+    tf = tweet_file.open("ab", buffering=1 << 16)
+    try:
+        await page.goto(x_replies_url)
+        try:
+            await page.wait_for_selector("article", timeout=30000)
+        except PlaywrightTimeoutError:
+            print(f"[SCRAPE] {account_name}: no articles visible after load")
+
+        scrolls_done = 0
+        stagnant = 0
+        while scrolls_done < total_scrolls:
+            async with _scroll_sem:
+                await page.mouse.wheel(0, 3000)
+                # returns as soon as the timeline quiets down; scroll_delay is
+                # now the upper bound rather than a fixed cost per scroll
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=int(scroll_delay * 1000))
+                except PlaywrightTimeoutError:
+                    pass
+                scrolls_done += 1
+                try:
+                    if await page.evaluate(JS_EXPAND_SHOWMORE, SHOWMORE_MAX):
+                        await asyncio.sleep(1.0)
+                except Exception as e:
+                    print(f"[ERROR] show-more error: {e}")
+                try:
+                    tweets = await page.evaluate(JS_EXTRACT_TWEETS)
+                except Exception as e:
+                    print(f"[ERROR] extract error: {e}")
+                    continue
+
+            new_lines = []
+            for tweet_dict in tweets:
+                ts_hash = hash(tweet_dict["timestamp"])
+                if ts_hash in seen_timestamps:
+                    continue
+                seen_timestamps.add(ts_hash)
+                new_lines.append(jsonl_line(tweet_dict))
+                total_collected += 1
+                tweet_queue.put(tweet_dict)
+            if new_lines:
+                # one gathered write per scroll instead of a write per tweet
+                tf.write(b"".join(new_lines))
+                tf.flush()
+                stagnant = 0
+            else:
+                # end of timeline or rate limit: every further scroll is pure
+                # wall-clock waste, so bail after a few empty rounds
+                stagnant += 1
+                if stagnant >= EXHAUSTED_AFTER:
+                    print(f"[SCRAPE] {account_name}: no new tweets after {stagnant} scrolls, stopping early")
+                    break
+    finally:
+        tf.close()
+        await page.close()
+    return total_collected
+
+async def scrape_and_comment(account_name: str, model: str = "deepseek-r1-distill-llama-8b-abliterated", api_url: str = "http://127.0.0.1:1234/v1/chat/completions", rolling_context_length: int = 10, total_scrolls: int = 50, scroll_delay: float = 2.5):
+    subfolder = Path(account_name)
+    subfolder.mkdir(parents=True, exist_ok=True)
+    tweet_file = subfolder / "tweets.jsonl"
+    commentary_file = subfolder / "commentary.jsonl"
+    summary_file = subfolder / "summary.jsonl"
+    report_file = subfolder / "meta_summary.txt"
+
+    tweet_file.touch(exist_ok=True)
+    commentary_file.touch(exist_ok=True)
+    summary_file.touch(exist_ok=True)
+
+    x_replies_url = f"https://x.com/{account_name}/with_replies"
+    summary_prompt = (
+        "The following tweets are from a public account, arranged in chronological order. Write a single narrative paragraph that captures shifts in tone, rhetorical strategy, and attention. "
+        "Highlight bias, contradictions, or strategic intent. Avoid listing or rephrasing each tweet. This should feel like you're tracing a person's thinking or narrative arc over time.\n\n"
+    )
+
+    seen_timestamps = _rehydrate_seen(commentary_file)
+
+    start_time = time.time()
+
+    tweet_queue = queue.Queue()
+    worker = threading.Thread(
+        target=llm_worker,
+        args=(account_name, tweet_queue, model, api_url, rolling_context_length,
+              summary_prompt, commentary_file, summary_file, start_time))
+    worker.start()
+
+    try:
+        total_collected = await _scrape(account_name, x_replies_url, tweet_file,
+                                        tweet_queue, seen_timestamps, total_scrolls, scroll_delay)
+    except Exception as e:
+        print(f"[ERROR] scrape failed for {account_name}: {e}")
+        total_collected = 0
+
+    tweet_queue.put(None)
+    await asyncio.to_thread(worker.join)
+
+    await asyncio.to_thread(generate_overall_report, account_name, summary_file, report_file)
+    print(f"[DONE] {total_collected} tweets processed. Final report saved to: {report_file}")
+
+@app.route("/", methods=["GET", "POST"])
+def index():
+    if request.method == "POST":
+        account = request.form.get("account_name", "").strip()
+        if not account:
+            return "<p>Invalid account name.</p>"
+        with _jobs_lock:
+            job = scrape_jobs.get(account)
+            if job is None or job.done():
+                scrape_jobs[account] = asyncio.run_coroutine_threadsafe(
+                    scrape_and_comment(account), get_loop())
+        return redirect(url_for("feed", account_name=account, live="1"))
+    return """
+    <html><body>
+    <form method="POST">
+        <label>Account:</label><input name="account_name" required>
+        <button>Start</button>
+    </form>
+    </body></html>
+    """
+
+FEED_LIMIT = 200
+FEED_LIMIT_MAX = 1000
+
+# render_template_string re-parses and recompiles the Jinja source on every
+# request; compile once at import and render the compiled template instead.
+app.jinja_env.filters["strip_think"] = strip_think_tags
+_FEED_TPL = app.jinja_env.from_string("""
+    <html><body><h1>{{account_name}}</h1>
+    {% if live == "1" %}
+        <p><i>Scraping in progress...</i></p>
+        <div id="live-feed"></div>
+        <script>
+        const es = new EventSource("/events/{{account_name}}");
+        es.onmessage = (ev) => {
+            const d = JSON.parse(ev.data);
+            const div = document.createElement("div");
+            const b = document.createElement("b");
+            b.textContent = `[${d.timestamp}] @${d.from_user}`;
+            const i = document.createElement("i");
+            i.textContent = d.llm_commentary || "";
+            div.append(b, ": " + d.content, document.createElement("br"), i);
+            document.getElementById("live-feed").prepend(div);
+        };
+        es.onerror = () => es.close();
+        </script>
+    {% endif %}
+    {% for item in feed_data %}
+    <div><b>[{{item.timestamp}}] @{{item.from_user}}</b>: {{item.content}}<br><i>{{ item.llm_commentary|strip_think }}</i></div>
+    {% endfor %}
+    <hr>
+    {% for sum in summaries %}
+    <div><b>Summary Block ({{sum.block_tweets[0]}} → {{sum.block_tweets[-1]}}):</b><br>{{sum.summary}}</div>
+    {% endfor %}
+    </body></html>
+    """)
+
+@app.route("/events/<account_name>")
+def events(account_name):
+    """Tail commentary.jsonl as Server-Sent Events: only bytes appended after
+    the client connects cross the wire, instead of the whole feed per poll."""
+    commentary_file = Path(account_name) / "commentary.jsonl"
+    if not commentary_file.exists():
+        return "<p>No data found for %s.</p>" % account_name, 404
+
+    def gen():
+        with commentary_file.open("rb") as f:
+            f.seek(0, 2)
+            buf = b""
+            while True:
+                chunk = f.read(1 << 16)
+                if chunk:
+                    buf += chunk
+                    nl = buf.find(b"\n")
+                    while nl != -1:
+                        yield b"data: " + buf[:nl] + b"\n\n"
+                        buf = buf[nl + 1:]
+                        nl = buf.find(b"\n")
+                else:
+                    job = scrape_jobs.get(account_name)
+                    if job is None or job.done():
+                        break
+                    time.sleep(0.5)
+
+    return Response(stream_with_context(gen()), mimetype="text/event-stream")
+
+@app.route("/feed/<account_name>")
+def feed(account_name):
+    live = request.args.get("live", "0")
+    subfolder = Path(account_name)
+    commentary_file = subfolder / "commentary.jsonl"
+    summary_file = subfolder / "summary.jsonl"
+
+    if not commentary_file.exists():
+        return f"<p>No data found for {account_name}.</p>"
+
+    try:
+        limit = min(int(request.args.get("limit", FEED_LIMIT)), FEED_LIMIT_MAX)
+    except ValueError:
+        limit = FEED_LIMIT
+
+    items = read_jsonl(commentary_file)
+    all_summaries = read_jsonl(summary_file)
+
+    job = scrape_jobs.get(account_name)
+    if job is not None and job.done():
+        live = "0"
+
+    # the files are append-only, so (line counts, limit, live) fully determine
+    # the rendered page — cheap ETag, and unchanged feeds return 304
+    etag = f'"{len(items)}-{len(all_summaries)}-{limit}-{live}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        return "", 304
+
+    # newest `limit` entries without sorting the whole history
+    feed_data = heapq.nlargest(limit, items, key=lambda x: x.get("timestamp", ""))
+    summaries = sorted(all_summaries, key=lambda x: x.get("generated_at", ""))
+
+    resp = app.make_response(_FEED_TPL.render(account_name=account_name, feed_data=feed_data, summaries=summaries, live=live))
+    resp.headers["ETag"] = etag
+    return resp
+
+if __name__ == "__main__":
+    try:
+        from waitress import serve
+        serve(app, host="127.0.0.1", port=5000, threads=16)
+    except ImportError:
+        app.run(port=5000, debug=False, threaded=True, use_reloader=False)